@@ -6,8 +6,9 @@ import asyncio
 import logging
 import os
 import sys
-from dataclasses import dataclass
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Final
 
@@ -15,7 +16,7 @@ from handlers import agent_event_stream_handler
 from dotenv import load_dotenv  # type: ignore[import-not-found]
 from pydantic_ai import Agent, RunContext  # type: ignore[import-not-found]
 
-from make_diff import make_diff_string
+from make_diff import DEFAULT_MAX_DIFF_BYTES, GitBatch, make_diff_string
 
 PROJECT_ROOT = Path(__file__).parent
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env", override=False)
@@ -81,6 +82,21 @@ Important instructions:
 class Deps:
     repo_path: Path = DEFAULT_REPO_PATH
     release_notes_path: Path = DEFAULT_RELEASE_NOTES_PATH
+    # Memoized git lookups, scoped to a single agent run.
+    resolved_cache: dict[tuple[str | None, str | None], tuple[str, str, str, str]] = field(default_factory=dict)
+    commit_info_cache: dict[str, dict[str, str]] = field(default_factory=dict)
+    git_batch: GitBatch | None = field(default=None, repr=False)
+
+    def ensure_batch(self) -> GitBatch:
+        """Return the long-lived git lookup process for the repo, creating it on first use."""
+        if self.git_batch is None:
+            self.git_batch = GitBatch(self.repo_path)
+        return self.git_batch
+
+    async def aclose(self) -> None:
+        if self.git_batch is not None:
+            await self.git_batch.aclose()
+            self.git_batch = None
 
 
 release_notes_agent = Agent(
@@ -97,18 +113,29 @@ async def make_diff(  # type: ignore[override]
     from_ref: str | None = None,
     to_ref: str | None = None,
     ignore_patterns: list[str] | None = None,
+    max_diff_bytes: int | None = DEFAULT_MAX_DIFF_BYTES,
 ) -> str:
-    """Return a markdown diff report for the configured repository."""
+    """Return a markdown diff report for the configured repository.
+
+    Per-file patches are trimmed so the full diff stays under about `max_diff_bytes`.
+    """
+    return await make_diff_string(
+        from_pointer=from_ref,
+        to_pointer=to_ref,
+        ignore_patterns=ignore_patterns,
+        repo_dir=ctx.deps.repo_path,
+        resolved_cache=ctx.deps.resolved_cache,
+        commit_info_cache=ctx.deps.commit_info_cache,
+        git_batch=ctx.deps.ensure_batch(),
+        max_diff_bytes=max_diff_bytes,
+    )
 
-    def _run():
-        return make_diff_string(
-            from_pointer=from_ref,
-            to_pointer=to_ref,
-            ignore_patterns=ignore_patterns,
-            repo_dir=ctx.deps.repo_path,
-        )
 
-    return await asyncio.to_thread(_run)
+# Small shared pool for the tools' blocking file IO; git calls run as asyncio subprocesses.
+_IO_EXECUTOR: Final = ThreadPoolExecutor(max_workers=2, thread_name_prefix="agent-io")
+
+# Release notes contents keyed by path, along with the mtime they were read at.
+_release_notes_cache: dict[Path, tuple[int, str]] = {}
 
 
 @release_notes_agent.tool
@@ -117,19 +144,29 @@ async def get_release_notes(ctx: RunContext[Deps]) -> str:
     path = ctx.deps.release_notes_path
 
     def _read():
-        if path.exists():
-            return path.read_text()
-        else:
-            raise FileNotFoundError(f"Release notes file not found at {path}")
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Release notes file not found at {path}") from None
+        cached = _release_notes_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        text = path.read_bytes().decode("utf-8")
+        _release_notes_cache[path] = (mtime, text)
+        return text
 
-    return await asyncio.to_thread(_read)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_IO_EXECUTOR, _read)
 
 
 async def run_release_notes_agent(prompt: str | None = None) -> str:
     """Run the agent with the provided user prompt."""
     deps = Deps()
     user_prompt = prompt or "Draft release notes for the latest changes in the repo."
-    result = await release_notes_agent.run(user_prompt, deps=deps, event_stream_handler=agent_event_stream_handler)
+    try:
+        result = await release_notes_agent.run(user_prompt, deps=deps, event_stream_handler=agent_event_stream_handler)
+    finally:
+        await deps.aclose()
     saved_path = save_release_notes(result.output, deps.repo_path)
     return result.output, saved_path
 
@@ -137,7 +174,7 @@ async def run_release_notes_agent(prompt: str | None = None) -> str:
 def save_release_notes(content: str, dest_dir: Path) -> Path:
     """Persist generated release notes to disk."""
     dest_dir.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime())
     path = dest_dir / f"release-notes-{timestamp}.md"
     path.write_text(content)
     return path
@@ -3,242 +3,479 @@
 Generate a markdown file with git diff information between two commits/branches.
 """
 
+import asyncio
+import io
+import re
+import shlex
 import subprocess
 import sys
-from datetime import datetime
+import time
 from pathlib import Path
 
+DIFF_STREAM_LIMIT = 1 << 26
+DIFF_READ_SIZE = 1 << 20
+DEFAULT_MAX_DIFF_BYTES = 200_000
+# Git diff format: "diff --git a/path b/path" starts a new file block. Matching the
+# preceding newline gives the regex engine a literal prefix to search for.
+DIFF_HEADER_RE = re.compile(rb'\ndiff --git [^\n]*')
+STATUS_DESCRIPTIONS = {
+    "A": "Added",
+    "M": "Modified",
+    "D": "Deleted",
+    "R": "Renamed",
+    "C": "Copied",
+}
+# Full SHA-1 or SHA-256 object names.
+FULL_SHA_RE = re.compile(r'[0-9a-fA-F]{40}|[0-9a-fA-F]{64}')
+BATCH_CHECK_CMD = ["git", "cat-file", "--batch-check=%(objectname)"]
+
+
+async def run_git_command(cmd, check=True, shell=False, cwd=None, input=None, text=True):
+    """
+    Run a git command without blocking the event loop and return the output.
 
-def run_git_command(cmd, check=True, shell=False, cwd=None):
-    """Run a git command and return the output."""
-    try:
-        if isinstance(cmd, str) and shell:
-            # If shell=True, use shell execution
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=check,
-                cwd=cwd,
-            )
-        else:
-            # If cmd is a list or shell=False, use list execution (safer)
-            if isinstance(cmd, str):
-                # Split string into list for shell=False
-                import shlex
-                cmd = shlex.split(cmd)
-            result = subprocess.run(
-                cmd,
-                shell=False,
-                capture_output=True,
-                text=True,
-                check=check,
-                cwd=cwd,
-            )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        cmd_str = cmd if isinstance(cmd, str) else ' '.join(cmd)
-        print(f"Error running git command: {cmd_str}", file=sys.stderr)
-        print(f"Error: {e.stderr}", file=sys.stderr)
-        raise
+    With `text=False` the raw stdout bytes are returned undecoded and unstripped.
+    """
+    stdin = subprocess.PIPE if input is not None else None
+    if isinstance(cmd, str) and shell:
+        # If shell=True, use shell execution
+        proc = await asyncio.create_subprocess_shell(
+            cmd,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+        )
+    else:
+        # If cmd is a list or shell=False, use list execution (safer)
+        if isinstance(cmd, str):
+            # Split string into list for shell=False
+            cmd = shlex.split(cmd)
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+        )
+    stdout, stderr = await proc.communicate(input.encode() if input is not None else None)
+    if check and proc.returncode:
+        _raise_git_error(cmd, proc.returncode, stdout, stderr)
+    if not text:
+        return stdout
+    # Decode the whole buffer once; replace invalid bytes rather than failing on them.
+    return stdout.decode('utf-8', errors='replace').strip()
 
 
-def resolve_commit_pointer(pointer, repo_dir=None):
-    """Resolve a git pointer (branch, tag, or commit) to a commit SHA."""
-    if not pointer:
-        return None
-    sha = run_git_command(
-        ["git", "rev-parse", pointer], check=True, shell=False, cwd=repo_dir
-    )
-    return sha
+def _raise_git_error(cmd, returncode, stdout, stderr):
+    """Report a failed git command and raise CalledProcessError."""
+    cmd_str = cmd if isinstance(cmd, str) else ' '.join(cmd)
+    print(f"Error running git command: {cmd_str}", file=sys.stderr)
+    print(f"Error: {stderr.decode()}", file=sys.stderr)
+    raise subprocess.CalledProcessError(returncode, cmd, stdout, stderr)
 
 
-def get_commit_info(sha, repo_dir=None):
-    """Get commit information for a given SHA."""
-    commit_msg = run_git_command(
-        ["git", "log", "-1", "--pretty=format:%s", sha],
-        check=True,
-        shell=False,
-        cwd=repo_dir,
-    )
-    commit_date = run_git_command(
-        ["git", "log", "-1", "--pretty=format:%ai", sha],
-        check=True,
-        shell=False,
-        cwd=repo_dir,
-    )
-    return {
-        "sha": sha,
-        "message": commit_msg,
-        "date": commit_date,
-    }
+def _batch_check_input(pointers):
+    """Build `git cat-file --batch-check` input for the pointers, one per line."""
+    # "^{commit}" peels annotated tags so every SHA returned is a commit SHA.
+    return "".join(f"{pointer}^{{commit}}\n" for pointer in pointers)
 
 
-def get_commit_list(from_sha, to_sha, repo_dir=None):
-    """Get list of commits between two SHAs."""
-    if from_sha == to_sha:
-        return []
-    commits = run_git_command(
-        ["git", "log", "--pretty=format:%H|%s|%ai", f"{from_sha}..{to_sha}"], check=True, shell=False, cwd=repo_dir
-    )
-    if not commits:
-        return []
-    commit_list = []
-    for line in commits.split('\n'):
-        parts = line.split('|', 2)
-        if len(parts) == 3:
-            commit_list.append({
-                "sha": parts[0],
-                "message": parts[1],
-                "date": parts[2],
-            })
-    return commit_list
+def _batch_check_sha(line):
+    """Return the SHA from a `git cat-file --batch-check` line, or None if it wasn't found."""
+    return None if line.endswith((" missing", " ambiguous")) else line
+
+
+class GitBatch:
+    """
+    A long-lived `git cat-file --batch-check` process for resolving pointers.
+
+    The process is started on first use and reused for every lookup after that,
+    so repeated resolutions don't fork git. It talks to git through asyncio
+    pipes, so it must be used from a single event loop. Call aclose() (or use
+    it as an async context manager) to shut it down.
+    """
+
+    def __init__(self, repo_dir=None):
+        self.repo_dir = repo_dir
+        self._proc = None
+        # Serializes request/response round-trips from concurrent tool calls
+        self._lock = asyncio.Lock()
+
+    async def resolve(self, pointers):
+        """Resolve pointers to commit SHAs, returning None for any that don't name a commit."""
+        async with self._lock:
+            if self._proc is None:
+                self._proc = await asyncio.create_subprocess_exec(
+                    *BATCH_CHECK_CMD,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    # Nothing reads stderr while the process is alive, so don't let it fill a pipe
+                    stderr=subprocess.DEVNULL,
+                    cwd=self.repo_dir,
+                )
+            proc = self._proc
+            try:
+                proc.stdin.write(_batch_check_input(pointers).encode())
+                await proc.stdin.drain()
+                lines = [await proc.stdout.readline() for _ in pointers]
+            except ConnectionError:
+                lines = [b""]
+            except BaseException:
+                # A round-trip cut short (e.g. by cancellation) leaves unread answers in
+                # the pipe that the next lookup would take as its own, so drop the process.
+                self._proc = None
+                if proc.returncode is None:
+                    proc.kill()
+                raise
+            if not all(lines):
+                # The process exited, e.g. because repo_dir isn't a git repository
+                self._proc = None
+                proc.stdin.close()
+                message = f"git cat-file exited unexpectedly; is {self.repo_dir} a git repository?"
+                _raise_git_error(BATCH_CHECK_CMD, await proc.wait(), b"", message.encode())
+        return [_batch_check_sha(line.decode('utf-8', errors='replace').rstrip('\n')) for line in lines]
+
+    async def aclose(self):
+        """Stop the git process, if one was started."""
+        if self._proc is not None:
+            proc, self._proc = self._proc, None
+            proc.stdin.close()
+            await proc.wait()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+async def resolve_commit_pointers(pointers, repo_dir=None, batch=None):
+    """
+    Resolve several git pointers to commit SHAs with a single `git cat-file --batch-check`.
 
+    Lookups go through `batch` (a GitBatch) when one is provided instead of starting
+    a new process. Pointers that don't name a commit resolve to None instead of
+    raising, so this can also be used to probe whether a branch exists.
+    """
+    if any('\n' in pointer for pointer in pointers):
+        raise ValueError("Git pointers cannot contain newlines.")
+    # Full SHAs (e.g. echoed back from an earlier report) don't need a round-trip to git.
+    shas = {pointer: pointer.lower() for pointer in pointers if FULL_SHA_RE.fullmatch(pointer)}
+    unresolved = [pointer for pointer in dict.fromkeys(pointers) if pointer not in shas]
+    if unresolved and batch is not None:
+        shas.update(zip(unresolved, await batch.resolve(unresolved)))
+    elif unresolved:
+        output = await run_git_command(
+            BATCH_CHECK_CMD,
+            check=True,
+            shell=False,
+            cwd=repo_dir,
+            input=_batch_check_input(unresolved),
+        )
+        for pointer, line in zip(unresolved, output.split('\n')):
+            shas[pointer] = _batch_check_sha(line)
+    return [shas[pointer] for pointer in pointers]
+
+
+async def get_commit_infos(shas, repo_dir=None, cache=None):
+    """
+    Get commit information for several SHAs, keyed by SHA.
+
+    SHAs are immutable, so results are memoized in `cache` (a dict keyed by SHA)
+    when one is provided. A SHA that names another object pointing at a commit
+    (e.g. an annotated tag) maps to that commit's info, whose "sha" is the commit's.
+    """
+    if cache is None:
+        cache = {}
+    missing = [sha for sha in dict.fromkeys(shas) if sha not in cache]
+    if missing:
+        # One `git log --no-walk` returns subject and date for every SHA, separated by NUL bytes.
+        output = await run_git_command(
+            ["git", "log", "--no-walk=unsorted", "--pretty=format:%H%x00%s%x00%ai", *missing],
+            check=True,
+            shell=False,
+            cwd=repo_dir,
+        )
+        for line in filter(None, output.split('\n')):
+            sha, commit_msg, commit_date = line.split('\x00', 2)
+            cache[sha] = {
+                "sha": sha,
+                "message": commit_msg,
+                "date": commit_date,
+            }
+        # `git log` prints the peeled commit's %H, so names that weren't commit SHAs
+        # themselves (full SHAs skip the "^{commit}" lookup when resolved) are peeled here.
+        unmatched = [sha for sha in missing if sha not in cache]
+        if unmatched:
+            output = await run_git_command(
+                BATCH_CHECK_CMD,
+                check=True,
+                shell=False,
+                cwd=repo_dir,
+                input=_batch_check_input(unmatched),
+            )
+            for sha, line in zip(unmatched, output.split('\n')):
+                commit_sha = _batch_check_sha(line)
+                if commit_sha not in cache:
+                    raise ValueError(f"Could not resolve '{sha}' to a commit.")
+                cache[sha] = cache[commit_sha]
+    return {sha: cache[sha] for sha in shas}
 
-def get_changed_files(from_sha, to_sha, ignore_patterns=None, repo_dir=None):
-    """Get list of changed files with their status."""
+
+async def get_commit_list(from_sha, to_sha, repo_dir=None):
+    """Get list of commits between two SHAs."""
     if from_sha == to_sha:
         return []
-    if ignore_patterns is None:
-        ignore_patterns = []
-
-    files = run_git_command(
-        ["git", "diff", "--name-status", f"{from_sha}..{to_sha}"],
+    # NUL separators keep subjects containing "|" or other punctuation intact.
+    commits = await run_git_command(
+        ["git", "log", "-z", "--pretty=format:%H%x00%s%x00%ai", f"{from_sha}..{to_sha}"],
         check=True,
         shell=False,
         cwd=repo_dir,
+        text=False,
     )
-    if not files:
-        return []
+    # With -z, records are NUL-separated just like their fields, so the output is a
+    # flat "<sha>\0<subject>\0<date>\0<sha>..." list read three fields at a time.
+    # (An empty subject yields adjacent NULs, so NUL pairs can't delimit records.)
+    fields = iter(commits.split(b'\x00'))
+    records = zip(fields, fields, fields)
+    return [
+        {
+            "sha": sha.decode('ascii'),
+            "message": message.decode('utf-8', errors='replace'),
+            "date": date.decode('ascii'),
+        }
+        for sha, message, date in records
+    ]
+
+
+def compile_ignore_patterns(ignore_patterns):
+    """
+    Compile substring ignore patterns into a single regex.
+
+    Returns None when there is nothing to ignore.
+    """
+    if not ignore_patterns:
+        return None
+    return re.compile('|'.join(map(re.escape, ignore_patterns)))
+
+
+def build_ignore_pathspecs(ignore_patterns):
+    """
+    Translate ignore patterns into git exclude pathspecs.
+
+    Returns the pathspecs along with any patterns that can't be expressed as one,
+    which still need to be filtered out on the Python side.
+    """
+    pathspecs = []
+    fallback_patterns = []
+    for pattern in ignore_patterns or []:
+        if pattern and not any(char in pattern for char in '*?[\\'):
+            # Without the glob magic "*" also matches "/", so this keeps the
+            # "pattern occurs anywhere in the path" semantics.
+            pathspecs.append(f":(top,exclude)*{pattern}*")
+        else:
+            fallback_patterns.append(pattern)
+    return pathspecs, fallback_patterns
+
+
+def parse_changed_files(raw, ignore_re=None):
+    """Parse `git diff --raw -z` output into a list of changed files with their status."""
     file_list = []
-    for line in files.split('\n'):
-        if line:
-            status = line[0]
-            filepath = line[1:].strip()
-            # Check if file should be ignored
-            if not any(pattern in filepath for pattern in ignore_patterns):
-                file_list.append({
-                    "status": status,
-                    "path": filepath,
-                })
+    # Raw -z format: ":<old mode> <new mode> <old sha> <new sha> <status>\0<path>\0[<new path>\0]"
+    fields = iter(raw.split('\x00'))
+    for meta in fields:
+        if not meta:
+            continue
+        status = meta.split()[-1][0]
+        filepath = next(fields)
+        if status in 'RC':
+            # Renames and copies list the source path first, then the destination
+            filepath = next(fields)
+        # Check if file should be ignored
+        if ignore_re is None or ignore_re.search(filepath) is None:
+            file_list.append({
+                "status": status,
+                "path": filepath,
+            })
     return file_list
 
 
-def get_full_diff(from_sha, to_sha, ignore_patterns=None, repo_dir=None):
-    """Get the full diff output, filtering out ignored files."""
-    if from_sha == to_sha:
-        return ""
-    if ignore_patterns is None:
-        ignore_patterns = []
+def _diff_block_path(line):
+    """Extract the file path from a "diff --git a/path b/path" line."""
+    # Try to get path from "b/path" first, fallback to "a/path"
+    if ' b/' in line:
+        return line.split(' b/')[-1].rstrip('\n')
+    elif ' a/' in line:
+        return line.split(' a/')[-1].rstrip('\n')
+    return line
 
-    # Get the full diff
-    diff = run_git_command(
-        ["git", "diff", f"{from_sha}..{to_sha}"], check=True, shell=False, cwd=repo_dir
-    )
 
-    if not diff or not ignore_patterns:
+def truncate_diff(diff, max_bytes):
+    """
+    Shorten a patch to about `max_bytes` by trimming each file's block.
+
+    Every file keeps its header lines, so the patch still shows which files
+    changed and how. Small blocks are kept whole and the leftover budget is
+    shared between the larger ones, which are cut at a line boundary and
+    followed by a note saying how many lines were dropped.
+    """
+    if len(diff) <= max_bytes:
         return diff
 
-    # Filter out diffs for ignored files
-    # Git diff format: "diff --git a/path b/path" starts a new file block
-    lines = diff.split('\n')
-    filtered_lines = []
-    skip_block = False
-
-    for line in lines:
-        # Check if this line starts a new file diff block
-        if line.startswith('diff --git'):
-            # Extract the file path from "diff --git a/path b/path"
-            # Try to get path from "b/path" first, fallback to "a/path"
-            if ' b/' in line:
-                file_path = line.split(' b/')[-1]
-            elif ' a/' in line:
-                file_path = line.split(' a/')[-1]
-            else:
-                file_path = line
-
-            # Check if this file should be ignored
-            skip_block = any(pattern in file_path for pattern in ignore_patterns)
-            if not skip_block:
-                filtered_lines.append(line)
-        elif skip_block:
-            # Skip lines until we hit the next diff block
+    starts = [0] + [match.start() + 1 for match in DIFF_HEADER_RE.finditer(diff)]
+    blocks = list(zip(starts, starts[1:] + [len(diff)]))
+    budgets = {}
+    remaining = max_bytes
+    for i, (start, end) in enumerate(sorted(blocks, key=lambda block: block[1] - block[0])):
+        budgets[start] = min(end - start, remaining // (len(blocks) - i))
+        remaining -= budgets[start]
+
+    truncated = bytearray()
+    for start, end in blocks:
+        block = memoryview(diff)[start:end]
+        if end - start <= budgets[start]:
+            truncated += block
             continue
-        else:
-            # Regular diff line, include it
-            filtered_lines.append(line)
+        # Always keep everything up to the first hunk header
+        header_end = diff.find(b'\n@@', start, end) + 1 or end
+        cut = max(diff.rfind(b'\n', start, start + budgets[start]) + 1, header_end)
+        truncated += memoryview(diff)[start:cut]
+        omitted = diff.count(b'\n', cut, end)
+        if omitted:
+            truncated += b'*(truncated, %d more lines)*\n' % omitted
+    return truncated
+
 
-    return '\n'.join(filtered_lines)
+async def get_diff(from_sha, to_sha, ignore_patterns=None, repo_dir=None, max_bytes=None):
+    """
+    Get the changed files and the full diff output, filtering out ignored files.
 
+    Both come from a single `git diff --raw -z -p` call: the NUL-separated raw file
+    list is printed first and ends with an extra NUL, followed by the patch. The patch
+    is streamed so only the kept part of it is held in memory.
+    Ignored files are excluded with pathspecs so git never generates their patches.
+    When `max_bytes` is set, the patch is trimmed to about that size with truncate_diff.
+    """
+    if from_sha == to_sha:
+        return [], ""
+    pathspecs, fallback_patterns = build_ignore_pathspecs(ignore_patterns)
+    ignore_re = compile_ignore_patterns(fallback_patterns)
+
+    cmd = ["git", "diff", "--raw", "-z", "-p", f"{from_sha}..{to_sha}"]
+    if pathspecs:
+        cmd += ["--", *pathspecs]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=repo_dir,
+        # Allow a very long raw file list without overrunning the reader.
+        limit=DIFF_STREAM_LIMIT,
+    )
 
-def _resolve_range(from_pointer, to_pointer, repo_dir=None, verbose=False):
+    try:
+        try:
+            raw = await proc.stdout.readuntil(b'\x00\x00')
+        except asyncio.IncompleteReadError as exc:
+            # No patch follows (e.g. an empty diff)
+            raw = exc.partial
+
+        # Drain the patch in large chunks and decode it once at the end.
+        diff = bytearray()
+        # Unscanned tail of the stream, always led by the newline that ended the
+        # previous line so every header can be found as "\ndiff --git".
+        pending = b'\n'
+        skip_block = False
+        while chunk := await proc.stdout.read(DIFF_READ_SIZE):
+            if ignore_re is None:
+                # Everything ignored was already excluded by git
+                diff += chunk
+                continue
+            # Only scan complete lines; a trailing partial line waits for the next chunk.
+            data = pending + chunk
+            cut = data.rfind(b'\n')
+            data, pending = memoryview(data)[:cut + 1], data[cut:]
+            # Safety net for patterns that couldn't be turned into pathspecs: let the
+            # regex engine find the file blocks and copy the kept ones over as slices.
+            start = 1
+            for match in DIFF_HEADER_RE.finditer(data):
+                if not skip_block:
+                    diff += data[start:match.start() + 1]
+                file_path = _diff_block_path(match.group()[1:].decode('utf-8', errors='replace'))
+                skip_block = ignore_re.search(file_path) is not None
+                start = match.start() + 1
+            if not skip_block:
+                diff += data[start:]
+        if not skip_block:
+            diff += pending[1:]
+
+        stderr = await proc.stderr.read()
+        await proc.wait()
+    finally:
+        # Reading can be interrupted (cancellation, an oversized raw list, a failing
+        # pattern), so don't leave git writing into a pipe nobody reads.
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+    if proc.returncode:
+        _raise_git_error(cmd, proc.returncode, b"", stderr)
+
+    if max_bytes is not None:
+        diff = truncate_diff(diff, max_bytes)
+    raw = raw.decode('utf-8', errors='replace')
+    full_diff = diff.decode('utf-8', errors='replace').rstrip('\n')
+    return parse_changed_files(raw, ignore_re), full_diff
+
+
+async def _resolve_range(from_pointer, to_pointer, repo_dir=None, verbose=False, batch=None):
     """Resolve pointers, applying defaults that mirror the CLI behavior."""
-    resolved_from = from_pointer
-    resolved_to = to_pointer
+    pointers = [p for p in (from_pointer, to_pointer) if p]
+    if len(pointers) < 2:
+        # Probe the default branches along with any explicit pointer in one go.
+        pointers = ["main", "develop", "HEAD"] + pointers
+    shas = dict(zip(pointers, await resolve_commit_pointers(pointers, repo_dir=repo_dir, batch=batch)))
 
+    resolved_from = from_pointer
     if not resolved_from:
-        try:
-            run_git_command(
-                ["git", "rev-parse", "--verify", "main"],
-                check=True,
+        if shas["main"]:
+            resolved_from = "main"
+        elif shas["develop"]:
+            resolved_from = "develop"
+        else:
+            resolved_from = await run_git_command(
+                ["git", "describe", "--tags", "--abbrev=0", "HEAD^"],
+                check=False,
                 shell=False,
                 cwd=repo_dir,
             )
-            resolved_from = "main"
-        except Exception:
-            try:
-                run_git_command(
-                    ["git", "rev-parse", "--verify", "develop"],
-                    check=True,
-                    shell=False,
-                    cwd=repo_dir,
-                )
-                resolved_from = "develop"
-            except Exception:
-                try:
-                    resolved_from = run_git_command(
-                        ["git", "describe", "--tags", "--abbrev=0", "HEAD^"],
-                        check=False,
-                        shell=False,
-                        cwd=repo_dir,
-                    )
-                    if not resolved_from:
-                        resolved_from = "main"
-                except Exception:
-                    resolved_from = "main"
+            if not resolved_from:
+                resolved_from = "main"
 
+    resolved_to = to_pointer
     if not resolved_to:
-        try:
-            run_git_command(
-                ["git", "rev-parse", "--verify", "develop"],
-                check=True,
-                shell=False,
-                cwd=repo_dir,
-            )
+        if shas["develop"]:
             resolved_to = "develop"
-        except Exception:
-            try:
-                run_git_command(
-                    ["git", "rev-parse", "--verify", "main"],
-                    check=True,
-                    shell=False,
-                    cwd=repo_dir,
-                )
-                resolved_to = "main"
-            except Exception:
-                resolved_to = "HEAD"
+        elif shas["main"]:
+            resolved_to = "main"
+        else:
+            resolved_to = "HEAD"
+
+    if resolved_from not in shas:
+        # Only reached when the start of the range fell back to `git describe`.
+        (shas[resolved_from],) = await resolve_commit_pointers(
+            [resolved_from], repo_dir=repo_dir, batch=batch
+        )
+    for pointer in (resolved_from, resolved_to):
+        if not shas[pointer]:
+            raise ValueError(f"Could not resolve git pointer '{pointer}' to a commit.")
+    from_sha, to_sha = shas[resolved_from], shas[resolved_to]
 
     if verbose:
         print(f"Resolving 'from' pointer: {resolved_from}")
-    from_sha = resolve_commit_pointer(resolved_from, repo_dir=repo_dir)
-    if verbose:
         print(f"  -> {from_sha}")
-
-    if verbose:
         print(f"Resolving 'to' pointer: {resolved_to}")
-    to_sha = resolve_commit_pointer(resolved_to, repo_dir=repo_dir)
-    if verbose:
         print(f"  -> {to_sha}")
 
     if from_sha == to_sha and verbose:
@@ -247,104 +484,93 @@ def _resolve_range(from_pointer, to_pointer, repo_dir=None, verbose=False):
     return resolved_from, resolved_to, from_sha, to_sha
 
 
-def build_markdown(
+async def build_markdown(
     from_pointer,
     to_pointer,
     from_sha,
     to_sha,
     ignore_patterns=None,
     repo_dir=None,
+    commit_info_cache=None,
+    max_diff_bytes=None,
 ):
     """Render markdown describing the diff."""
-    from_info = get_commit_info(from_sha, repo_dir=repo_dir)
-    to_info = get_commit_info(to_sha, repo_dir=repo_dir)
-    commits = get_commit_list(from_sha, to_sha, repo_dir=repo_dir)
-    changed_files = get_changed_files(from_sha, to_sha, ignore_patterns, repo_dir=repo_dir)
-    full_diff = get_full_diff(from_sha, to_sha, ignore_patterns, repo_dir=repo_dir)
-
-    lines = [
-        "# Git Diff Report",
-        "",
-        "## Commit Range",
-        f"- **From**: `{from_sha[:7]}` ({from_pointer or from_sha})",
-        f"  - Message: {from_info['message']}",
-        f"  - Date: {from_info['date']}",
-        f"- **To**: `{to_sha[:7]}` ({to_pointer or to_sha})",
-        f"  - Message: {to_info['message']}",
-        f"  - Date: {to_info['date']}",
-        "",
-    ]
-
+    if from_sha == to_sha:
+        # An empty range only needs the one commit's metadata.
+        commit_infos = await get_commit_infos([from_sha], repo_dir=repo_dir, cache=commit_info_cache)
+        commits, changed_files, full_diff = [], [], ""
+    else:
+        # The lookups are independent once the SHAs are known, so run them concurrently.
+        # The commit list keeps its own process: `git log -p` would emit per-commit
+        # patches rather than the net from..to diff that the report shows.
+        # A TaskGroup cancels the remaining lookups as soon as one of them fails.
+        try:
+            async with asyncio.TaskGroup() as group:
+                infos_task = group.create_task(
+                    get_commit_infos([from_sha, to_sha], repo_dir=repo_dir, cache=commit_info_cache)
+                )
+                commits_task = group.create_task(get_commit_list(from_sha, to_sha, repo_dir=repo_dir))
+                diff_task = group.create_task(
+                    get_diff(from_sha, to_sha, ignore_patterns, repo_dir=repo_dir, max_bytes=max_diff_bytes)
+                )
+        except ExceptionGroup as exc:
+            # Raise the underlying error (e.g. CalledProcessError) rather than the group
+            raise exc.exceptions[0] from None
+        commit_infos = infos_task.result()
+        commits = commits_task.result()
+        changed_files, full_diff = diff_task.result()
+    from_info, to_info = commit_infos[from_sha], commit_infos[to_sha]
+
+    buf = io.StringIO()
+    write = buf.write
+    write(
+        "# Git Diff Report\n"
+        "\n"
+        "## Commit Range\n"
+        f"- **From**: `{from_info['sha'][:7]}` ({from_pointer or from_sha})\n"
+        f"  - Message: {from_info['message']}\n"
+        f"  - Date: {from_info['date']}\n"
+        f"- **To**: `{to_info['sha'][:7]}` ({to_pointer or to_sha})\n"
+        f"  - Message: {to_info['message']}\n"
+        f"  - Date: {to_info['date']}\n"
+        "\n"
+        "## Commits\n"
+        "\n"
+    )
     if commits:
-        lines.extend(
-            [
-                "## Commits",
-                "",
-            ]
-        )
         for commit in commits:
-            lines.append(f"- `{commit['sha'][:7]}` - {commit['message']} ({commit['date']})")
-        lines.append("")
+            write(f"- `{commit['sha'][:7]}` - {commit['message']} ({commit['date']})\n")
+        write("\n")
     else:
-        lines.extend(
-            [
-                "## Commits",
-                "",
-                "*No commits between the specified range.*",
-                "",
-            ]
-        )
+        write("*No commits between the specified range.*\n\n")
 
+    write("## Changed Files\n\n")
     if changed_files:
-        lines.extend(
-            [
-                "## Changed Files",
-                "",
-            ]
-        )
-        status_map = {
-            "A": "Added",
-            "M": "Modified",
-            "D": "Deleted",
-            "R": "Renamed",
-            "C": "Copied",
-        }
         for file_info in changed_files:
-            status_desc = status_map.get(file_info["status"], file_info["status"])
-            lines.append(f"- **{status_desc}**: `{file_info['path']}`")
-        lines.append("")
+            status = file_info["status"]
+            write(f"- **{STATUS_DESCRIPTIONS.get(status, status)}**: `{file_info['path']}`\n")
+        write("\n")
     else:
-        lines.extend(
-            [
-                "## Changed Files",
-                "",
-                "*No files changed.*",
-                "",
-            ]
-        )
+        write("*No files changed.*\n\n")
 
-    lines.extend(
-        [
-            "## Full Diff",
-            "",
-            "```diff",
-            full_diff,
-            "```",
-        ]
-    )
+    write("## Full Diff\n\n```diff\n")
+    write(full_diff)
+    write("\n```")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 def generate_markdown(from_pointer, to_pointer, from_sha, to_sha, output_path, ignore_patterns=None, repo_dir=None):
     """Generate the markdown file with all diff information."""
-    markdown = build_markdown(
-        from_pointer,
-        to_pointer,
-        from_sha,
-        to_sha,
-        ignore_patterns=ignore_patterns,
-        repo_dir=repo_dir,
+    markdown = asyncio.run(
+        build_markdown(
+            from_pointer,
+            to_pointer,
+            from_sha,
+            to_sha,
+            ignore_patterns=ignore_patterns,
+            repo_dir=repo_dir,
+        )
     )
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -354,19 +580,43 @@ def generate_markdown(from_pointer, to_pointer, from_sha, to_sha, output_path, i
     return output_path
 
 
-def make_diff_string(from_pointer=None, to_pointer=None, ignore_patterns=None, repo_dir=None):
-    """Return the diff report as a markdown string instead of writing to disk."""
+async def make_diff_string(
+    from_pointer=None,
+    to_pointer=None,
+    ignore_patterns=None,
+    repo_dir=None,
+    resolved_cache=None,
+    commit_info_cache=None,
+    git_batch=None,
+    max_diff_bytes=DEFAULT_MAX_DIFF_BYTES,
+):
+    """
+    Return the diff report as a markdown string instead of writing to disk.
+
+    `resolved_cache` and `commit_info_cache` are optional dicts that memoize
+    resolved ranges and commit metadata across calls against the same repository.
+    `git_batch` is an optional GitBatch used to resolve pointers without forking git.
+    The full diff is trimmed to about `max_diff_bytes` (None keeps all of it) so large
+    ranges don't blow up the size of the report.
+    """
     ignore_patterns = ignore_patterns or ['uv.lock', 'package-lock.json']
-    from_pointer, to_pointer, from_sha, to_sha = _resolve_range(
-        from_pointer, to_pointer, repo_dir=repo_dir, verbose=False
-    )
-    return build_markdown(
+    if resolved_cache is None:
+        resolved_cache = {}
+    key = (from_pointer, to_pointer)
+    if key not in resolved_cache:
+        resolved_cache[key] = await _resolve_range(
+            from_pointer, to_pointer, repo_dir=repo_dir, verbose=False, batch=git_batch
+        )
+    from_pointer, to_pointer, from_sha, to_sha = resolved_cache[key]
+    return await build_markdown(
         from_pointer,
         to_pointer,
         from_sha,
         to_sha,
         ignore_patterns=ignore_patterns,
         repo_dir=repo_dir,
+        commit_info_cache=commit_info_cache,
+        max_diff_bytes=max_diff_bytes,
     )
 
 
@@ -386,8 +636,8 @@ def make_diff(from_pointer=None, to_pointer=None, output_dir=None, ignore_patter
         Path to the generated markdown file.
     """
     ignore_patterns = ignore_patterns or ['uv.lock', 'package-lock.json']
-    from_pointer, to_pointer, from_sha, to_sha = _resolve_range(
-        from_pointer, to_pointer, repo_dir=repo_dir, verbose=True
+    from_pointer, to_pointer, from_sha, to_sha = asyncio.run(
+        _resolve_range(from_pointer, to_pointer, repo_dir=repo_dir, verbose=True)
     )
 
     # Determine output directory
@@ -398,7 +648,7 @@ def make_diff(from_pointer=None, to_pointer=None, output_dir=None, ignore_patter
         output_dir = Path(output_dir)
 
     # Generate filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
     from_short = from_sha[:7]
     to_short = to_sha[:7]
     filename = f"diff_{timestamp}_{from_short}_to_{to_short}.md"